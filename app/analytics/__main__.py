@@ -0,0 +1,70 @@
+"""
+Offline SSH analysis without the database.
+
+    python -m app.analytics /var/log/auth.log.1 archive/auth.log.*.gz --window-hours 48 --workers 4
+
+Prints JSON with the summary, KPI, top-attacker, timeline and brute-force reports.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.analytics.offline import aggregate_files, default_workers, offline_reports
+
+
+def _parse_end(value: str) -> datetime:
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _bounded(lo: int, hi: int):
+    # integer argparse type with the same bounds as the matching API query parameter
+    def parse(value: str) -> int:
+        try:
+            n = int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"{value!r} is not an integer")
+        if not lo <= n <= hi:
+            raise argparse.ArgumentTypeError(f"must be between {lo} and {hi}, got {n}")
+        return n
+    return parse
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m app.analytics", description="Offline SSH auth.log analysis (plain or gzip).")
+    ap.add_argument("files", nargs="+", help="auth.log files, plain or gzip")
+    ap.add_argument("--end", type=_parse_end, default=None, help="window end (ISO 8601, UTC if naive); default: last event")
+    ap.add_argument("--window-hours", type=_bounded(1, 168), default=24)
+    ap.add_argument("--top-n", type=_bounded(1, 50), default=10)
+    ap.add_argument("--limit", type=_bounded(1, 50), default=5, help="number of top attackers")
+    ap.add_argument("--bucket-minutes", type=_bounded(5, 60), default=60)
+    ap.add_argument("--threshold", type=_bounded(1, 500), default=5, help="brute-force threshold")
+    ap.add_argument("--window-minutes", type=_bounded(1, 120), default=2, help="brute-force window")
+    ap.add_argument("--workers", type=_bounded(1, 256), default=1, help=f"parser processes (e.g. {default_workers()})")
+    ap.add_argument("--indent", type=_bounded(0, 8), default=2)
+    args = ap.parse_args(argv)
+
+    missing = [f for f in args.files if not Path(f).is_file()]
+    if missing:
+        ap.error(f"file not found: {', '.join(missing)}")
+
+    agg = aggregate_files(args.files, workers=args.workers)
+    reports = offline_reports(
+        agg,
+        end=args.end,
+        window_hours=args.window_hours,
+        top_n=args.top_n,
+        limit=args.limit,
+        bucket_minutes=args.bucket_minutes,
+        bf_threshold=args.threshold,
+        bf_window_minutes=args.window_minutes,
+    )
+    json.dump(reports, sys.stdout, indent=args.indent or None)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
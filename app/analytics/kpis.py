@@ -2,9 +2,11 @@ from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
+from app.core.metrics import instrumented
 from app.db.models import Event
 
 
+@instrumented
 def ssh_business_kpis(db: Session, window_hours: int = 24):
     # Compute business KPIs related to SSH failed login attempts over a time window
     window_end = datetime.now(timezone.utc)
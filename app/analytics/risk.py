@@ -0,0 +1,11 @@
+# Shared risk thresholds; no database imports so the offline CLI can use them too.
+
+def risk_level(failed_attempts: int) -> str:
+    # tweak thresholds however you like
+    if failed_attempts >= 20:
+        return "CRITICAL"
+    if failed_attempts >= 10:
+        return "HIGH"
+    if failed_attempts >= 5:
+        return "MEDIUM"
+    return "LOW"
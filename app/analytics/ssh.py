@@ -2,9 +2,11 @@ from datetime import datetime, timezone, timedelta
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
+from app.core.metrics import instrumented
 from app.db.models import Event
 
 
+@instrumented
 def ssh_summary(
     db: Session,
     window_hours: int = 24,
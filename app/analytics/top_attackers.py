@@ -4,19 +4,11 @@ from datetime import datetime, timedelta
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.analytics.risk import risk_level
+from app.core.metrics import instrumented
 from app.db.models import Event
 
-def _risk_level(failed_attempts: int) -> str:
-    # tweak thresholds however you like
-    if failed_attempts >= 20:
-        return "CRITICAL"
-    if failed_attempts >= 10:
-        return "HIGH"
-    if failed_attempts >= 5:
-        return "MEDIUM"
-    return "LOW"
-
-
+@instrumented
 def top_attackers(db: Session, window_hours: int = 24, limit: int = 5) -> dict:
     from app.db.models import Event  # <-- move here
 
@@ -69,7 +61,7 @@ def top_attackers(db: Session, window_hours: int = 24, limit: int = 5) -> dict:
             {
                 "ip": ip,
                 "failed_attempts": int(count),
-                "risk_level": _risk_level(int(count)),
+                "risk_level": risk_level(int(count)),
             }
             for ip, count in top_ips
         ],
@@ -1,93 +1,127 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import func
+from sqlalchemy import Integer, cast, func
 from sqlalchemy.orm import Session
 
+from app.core.metrics import instrumented
 from app.db.models import Event
 
-def _window_counts(db: Session, start: datetime, end: datetime):
-    base = (
-        db.query(Event)
-        .filter(
-            Event.event_type == "ssh_failed_password",
-            Event.ts >= start,
-            Event.ts < end,
-        )
-    )
+HIGH_RISK_THRESHOLD = 10
 
-    total_failed = base.count()
 
-    unique_ips = (
-        db.query(func.count(func.distinct(Event.ip)))
-        .filter(
-            Event.event_type == "ssh_failed_password",
-            Event.ts >= start,
-            Event.ts < end,
-            Event.ip.isnot(None),
-        )
-        .scalar() or 0
-    )
+def _period_metrics(total_failed: int, ip_counts: list[int], hours: float) -> dict:
+    high_risk_ips = sum(1 for c in ip_counts if c >= HIGH_RISK_THRESHOLD)
+    unique_ips = len(ip_counts)
+
+    # risk score (simple formula we used prior)
+    risk_score = round((total_failed *.5) + (unique_ips * 2) + (high_risk_ips * 5), 2)
+
+    attack_rate_per_hour = round(total_failed / max(hours, 1), 2)
 
-    ip_counts = (
-        db.query(Event.ip, func.count(Event.id).label("count"))
+    return {
+        "total_failed_attempts": total_failed,
+        "unique_ips": unique_ips,
+        "high_risk_ips": high_risk_ips,
+        "attack_rate_per_hour": float(attack_rate_per_hour),
+        "risk_score": float(risk_score),
+    }
+
+
+def _period_counts(db: Session, start: datetime, period_seconds: int, periods: int) -> list[dict]:
+    # One range scan over the whole span, grouped by (period index, ip).
+    # Period 0 is the oldest: [start + i*period, start + (i+1)*period).
+    end = start + timedelta(seconds=period_seconds * periods)
+    start_epoch = int(start.timestamp())
+    period_idx = (cast(func.strftime("%s", Event.ts), Integer) - start_epoch) // period_seconds
+
+    rows = (
+        db.query(period_idx.label("period"), Event.ip, func.count(Event.id).label("count"))
         .filter(
             Event.event_type == "ssh_failed_password",
             Event.ts >= start,
             Event.ts < end,
-            Event.ip.isnot(None),
         )
-        .group_by(Event.ip)
+        .group_by("period", Event.ip)
         .all()
     )
 
-    high_risk_ips = sum(1 for _, c in ip_counts if c >= 10)
+    totals = [0] * periods
+    ip_counts: list[list[int]] = [[] for _ in range(periods)]
+    for idx, ip, count in rows:
+        if idx is None:
+            continue
+        idx = min(max(int(idx), 0), periods - 1)
+        totals[idx] += count
+        if ip is not None:
+            ip_counts[idx].append(count)
 
-    # risk score (simple formula we used prior)
-    risk_score = round((total_failed *.5) + (int(unique_ips) * 2) + (high_risk_ips * 5), 2)
-    
-    attack_rate_per_hour = round(total_failed/max(((end-start).total_seconds() / 3600), 1), 2)
+    hours = period_seconds / 3600
+    return [_period_metrics(totals[i], ip_counts[i], hours) for i in range(periods)]
 
-    return {
-        "total_failed_attempts": total_failed,
-        "unique_ips": int(unique_ips),
-        "high_risk_ips": high_risk_ips,
-        "attack_rate_per_hour": float(attack_rate_per_hour),
-        "risk_score": float(risk_score),
-    }
 
 def _pct_change(curr: float, prev: float) -> float | None:
         if prev == 0:
             return None if curr != 0 else 0.0
         return round (((curr - prev) / prev) * 100.0, 2)
-    
-def ssh_trends(db: Session, window_hours: int = 24) -> dict:
-        now = datetime.now(timezone.utc)
 
-        curr_end = now
-        curr_start = curr_end - timedelta(hours=window_hours)
 
-        prev_end = curr_start
-        prev_start = prev_end - timedelta(hours=window_hours)
-
-        curr = _window_counts(db, curr_start, curr_end)
-        prev = _window_counts(db, prev_start, prev_end)
+@instrumented
+def ssh_trends(db: Session, window_hours: int = 24, periods: int = 2) -> dict:
+        """
+        Compare `periods` consecutive windows of `window_hours` each, ending now
+        (e.g. 7 x 24h for day-by-day, 4 x 168h for week-over-week).
+        """
+        periods = max(int(periods), 2)
+        period_seconds = window_hours * 3600
+
+        # whole seconds so SQLite's strftime('%s') bucketing lines up with the window bounds
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        start = now - timedelta(seconds=period_seconds * periods)
+
+        counts = _period_counts(db, start, period_seconds, periods)
+        bounds = [
+            (start + timedelta(seconds=period_seconds * i), start + timedelta(seconds=period_seconds * (i + 1)))
+            for i in range(periods)
+        ]
+        metric_names = list(counts[0].keys())
+
+        series = {k: [c[k] for c in counts] for k in metric_names}
+        rolling_deltas = {
+            k: [
+                {
+                    "change": round(series[k][i] - series[k][i - 1], 2),
+                    "pct_change": _pct_change(float(series[k][i]), float(series[k][i - 1])),
+                }
+                for i in range(1, periods)
+            ]
+            for k in metric_names
+        }
 
+        curr, prev = counts[-1], counts[-2]
         deltas = {
             k: {
                 "current": curr[k],
                 "previous": prev[k],
                 "pct_change": _pct_change(float(curr[k]), float(prev[k])),
             }
-            for k in curr.keys()
+            for k in metric_names
         }
 
+        (prev_start, prev_end), (curr_start, curr_end) = bounds[-2], bounds[-1]
+
         return {
             "window_hours": window_hours,
+            "periods": periods,
             "current_window": {
                 "start": curr_start.isoformat(), "end": curr_end.isoformat()},
             "previous_window": {
                 "start": prev_start.isoformat(), "end": prev_end.isoformat()},
-                "metrics": deltas,
-            }
-
+            "metrics": deltas,
+            "period_windows": [
+                {"index": i, "start": s.isoformat(), "end": e.isoformat(), **counts[i]}
+                for i, (s, e) in enumerate(bounds)
+            ],
+            "series": series,
+            "rolling_deltas": rolling_deltas,
+        }
@@ -1,14 +1,18 @@
 from typing import Optional
 from pathlib import Path
 import hashlib
+import time
 from datetime import datetime, timezone
 
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 
-from app.detection.detectors import detect_ssh_bruteforce
-from app.db.database import get_db
+from app.core import metrics
+from app.detection.detectors import detect_ssh_bruteforce, detect_ssh_spray
+from app.detection.spray import spray_index
+from app.db.database import checkpoint_wal, engine, get_db, get_read_db
 from app.db.models import Event
 from app.ingest.parser import parse_ssh_line
 
@@ -35,6 +39,14 @@ def root():
     return {"status": "ok", "app": "lockdown-log-analyzer"}
 
 
+# -------------------------
+# Metrics: Prometheus text format
+# -------------------------
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render_metrics(), media_type=metrics.CONTENT_TYPE)
+
+
 # -------------------------
 # Dev helper: insert one event
 # -------------------------
@@ -67,6 +79,7 @@ def create_test_event(
         db.add(e)
         db.commit()
         db.refresh(e)
+        spray_index.catch_up(db)
         return {"inserted_id": e.id, "repeat": repeat}
     except IntegrityError:
         db.rollback()
@@ -81,7 +94,7 @@ def create_test_event(
 @router.get("/events")
 def list_events(
     limit: int = Query(20, ge=1, le=500),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     rows = db.query(Event).order_by(Event.ts.desc()).limit(limit).all()
     return [
@@ -127,27 +140,42 @@ def ingest_ssh_logs(
     inserted = 0
     skipped = 0
     duplicates = 0
+    bytes_read = 0
+    committed = False
+    parse_seconds = 0.0
+    write_seconds = 0.0
 
     try:
-        with log_path.open("r", errors="ignore") as f:
-            for i, line in enumerate(f, start=1):
+        with metrics.query_scope("ingest_ssh"), log_path.open("rb") as f:
+            for i, raw_line in enumerate(f, start=1):
                 if max_lines is not None and i > max_lines:
                     break
+                bytes_read += len(raw_line)
 
-                parsed = parse_ssh_line(line)
+                t0 = time.perf_counter()
+                parsed = parse_ssh_line(raw_line.decode("utf-8", errors="ignore"))
+                t1 = time.perf_counter()
+                parse_seconds += t1 - t0
                 if not parsed:
                     skipped += 1
                     continue
 
                 try:
-                    db.add(Event(**parsed))
-                    db.flush()  # forces UNIQUE fingerprint check now
+                    # savepoint per row: a duplicate only discards itself, not earlier rows
+                    with db.begin_nested():
+                        db.add(Event(**parsed))
+                        db.flush()  # forces UNIQUE fingerprint check now
                     inserted += 1
                 except IntegrityError:
-                    db.rollback()  # clears failed insert state
                     duplicates += 1
+                write_seconds += time.perf_counter() - t1
 
-        db.commit()
+            t0 = time.perf_counter()
+            db.commit()
+            committed = True
+            spray_index.catch_up(db)  # pick up the committed rows (and any other writer's)
+            checkpoint_wal(engine)
+            write_seconds += time.perf_counter() - t0
 
     except SQLAlchemyError as e:
         db.rollback()
@@ -155,6 +183,15 @@ def ingest_ssh_logs(
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+    finally:
+        metrics.INGEST_BYTES.inc(bytes_read, source="ssh")
+        metrics.INGEST_LINES.inc(inserted + duplicates, source="ssh", outcome="parsed")
+        metrics.INGEST_LINES.inc(skipped, source="ssh", outcome="skipped")
+        # rows only count as inserted once the commit has landed
+        metrics.INGEST_ROWS.inc(inserted, source="ssh", outcome="inserted" if committed else "rolled_back")
+        metrics.INGEST_ROWS.inc(duplicates, source="ssh", outcome="duplicate")
+        metrics.INGEST_STAGE_SECONDS.inc(parse_seconds, source="ssh", stage="parse")
+        metrics.INGEST_STAGE_SECONDS.inc(write_seconds, source="ssh", stage="write")
 
     return {
         "inserted": inserted,
@@ -168,7 +205,7 @@ def ingest_ssh_logs(
 # -------------------------
 @router.get("/alerts/ssh-bruteforce")
 def list_ssh_bruteforce_alerts(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     threshold: int = Query(5, ge=1, le=500),
     window_minutes: int = Query(2, ge=1, le=120),
 ):
@@ -179,12 +216,39 @@ def list_ssh_bruteforce_alerts(
     )
     return {"detections": detections, "count": len(detections)}
 
+# -------------------------
+# Detection: SSH password spray / credential stuffing
+# -------------------------
+@router.get("/alerts/ssh-spray")
+def list_ssh_spray_alerts(
+    db: Session = Depends(get_read_db),
+    window_minutes: int = Query(60, ge=5, le=1440),
+    min_usernames_per_ip: int = Query(5, ge=2, le=10000),
+    min_ips_per_username: int = Query(5, ge=2, le=10000),
+    slow_window_hours: int = Query(24, ge=1, le=168),
+    slow_min_usernames: int = Query(10, ge=2, le=10000),
+    slow_max_per_hour: float = Query(5.0, gt=0, le=1000),
+):
+    detections = detect_ssh_spray(
+        db,
+        window_minutes=window_minutes,
+        min_usernames_per_ip=min_usernames_per_ip,
+        min_ips_per_username=min_ips_per_username,
+        slow_window_hours=slow_window_hours,
+        slow_min_usernames=slow_min_usernames,
+        slow_max_per_hour=slow_max_per_hour,
+    )
+    detections["count"] = sum(
+        len(detections[k]) for k in ("password_spray", "credential_stuffing", "low_and_slow")
+    )
+    return detections
+
 # -------------------------
 # Analytics: SSH summary
 # -------------------------
 @router.get("/analytics/ssh-summary")
 def analytics_ssh_summary(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     window_hours: int = Query(24, ge=1, le=168),
     top_n: int = Query(10, ge=1, le=50),
 ):
@@ -195,7 +259,7 @@ def analytics_ssh_summary(
 # -------------------------
 @router.get("/analytics/ssh-kpis")
 def analytics_ssh_kpis(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     window_hours: int = Query(24, ge=1, le=168),
 ):
     return ssh_business_kpis(db, window_hours=window_hours)
@@ -205,17 +269,18 @@ def analytics_ssh_kpis(
 # -------------------------
 @router.get("/analytics/ssh-trends")
 def analytics_ssh_trends(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     window_hours: int = Query(24, ge=1, le=168),
+    periods: int = Query(2, ge=2, le=60),
 ):
-    return ssh_trends(db, window_hours=window_hours)
+    return ssh_trends(db, window_hours=window_hours, periods=periods)
 
 # -------------------------
 # Analytics: SSH executive summary
 # -------------------------
 @router.get("/report/ssh-exec-summary")
 def report_ssh_exec_summary(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     window_hours: int = Query(24, ge=1, le=168),
 ):
     return ssh_exec_summary(db, window_hours=window_hours)
@@ -225,7 +290,7 @@ def report_ssh_exec_summary(
 # -------------------------
 @router.get("/analytics/top-attackers")
 def analytics_top_attackers(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     window_hours: int = Query(24, ge=1, le=168),
     limit: int = Query(5, ge=1, le=50),
 ):
@@ -236,7 +301,7 @@ def analytics_top_attackers(
 # -------------------------
 @router.get("/analytics/ssh-timeline")
 def analytics_ssh_timeline(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     window_hours: int = Query(24, ge=1, le=168),
     bucket_minutes: int = (Query(60, ge=5, le=60)),
 ):
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+
+# Runtime settings: a named performance profile, optionally overridden by a JSON file
+# (LOCKDOWN_CONFIG=/path/to/config.json) and then by LOCKDOWN_<FIELD> environment variables.
+#
+#   LOCKDOWN_PROFILE=ingest-heavy LOCKDOWN_CACHE_SIZE=-131072 uvicorn main:app
+
+ENV_PREFIX = "LOCKDOWN_"
+DEFAULT_DB_PATH = Path(__file__).resolve().parents[2] / "data" / "sentinel.db"
+
+
+@dataclass(frozen=True)
+class Settings:
+    profile: str = "default"
+    db_path: str = str(DEFAULT_DB_PATH)
+
+    # SQLite PRAGMAs applied to every new connection
+    synchronous: str = "NORMAL"        # OFF | NORMAL | FULL | EXTRA
+    cache_size: int = -16384           # negative = KiB (16 MiB), positive = pages
+    mmap_size: int = 0                 # bytes; 0 disables memory-mapped I/O
+    temp_store: str = "DEFAULT"        # DEFAULT | FILE | MEMORY
+    busy_timeout: int = 5000           # ms to wait on a locked database
+
+    # WAL checkpoint policy
+    wal_autocheckpoint: int = 1000     # pages; 0 disables automatic checkpoints
+    wal_checkpoint_after_ingest: str = ""  # "", PASSIVE, FULL, RESTART or TRUNCATE
+
+    # Connection pools (writer engine / read-only analytics engine)
+    pool_size: int = 5
+    max_overflow: int = 10
+    read_pool_size: int = 5
+    read_max_overflow: int = 10
+
+    # Slow-query log threshold in ms (0 disables, see app/core/metrics.py)
+    slow_query_ms: float = 0.0
+
+    # Spray detection index (see app/detection/spray.py)
+    spray_bucket_minutes: int = 5      # time resolution of the per-key distinct counters
+    spray_retention_hours: int = 168   # longest window /alerts/ssh-spray can answer
+    spray_exact_limit: int = 64        # exact sets up to this many values, then HyperLogLog
+
+
+PROFILES: dict[str, dict] = {
+    "default": {},
+    # Bulk ingest: bigger cache, checkpoint once per ingest instead of every 1000 pages.
+    # synchronous stays NORMAL: crash-safe under WAL, and OFF buys nothing while ingest flushes per row.
+    "ingest-heavy": {
+        "synchronous": "NORMAL",
+        "cache_size": -131072,
+        "temp_store": "MEMORY",
+        "busy_timeout": 15000,
+        "wal_autocheckpoint": 0,
+        "wal_checkpoint_after_ingest": "TRUNCATE",
+        "pool_size": 2,
+        "max_overflow": 2,
+        "read_pool_size": 2,
+        "read_max_overflow": 4,
+    },
+    # Dashboards/analytics: large cache + mmap for scans, more reader connections
+    "read-heavy": {
+        "synchronous": "NORMAL",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "wal_autocheckpoint": 1000,
+        "pool_size": 2,
+        "max_overflow": 2,
+        "read_pool_size": 10,
+        "read_max_overflow": 20,
+    },
+}
+
+_CHOICES = {
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+    "wal_checkpoint_after_ingest": {"", "PASSIVE", "FULL", "RESTART", "TRUNCATE"},
+}
+
+
+def _coerce(name: str, value, typ):
+    if typ in ("int", int):
+        return int(value)
+    if typ in ("float", float):
+        return float(value)
+    value = str(value)
+    if name in _CHOICES:
+        value = value.upper()
+        if value not in _CHOICES[name]:
+            raise ValueError(f"{name} must be one of {sorted(_CHOICES[name])}, got {value!r}")
+    return value
+
+
+def load_settings(env: dict | None = None) -> Settings:
+    """Build Settings from profile -> config file -> environment (later wins)."""
+    env = os.environ if env is None else env
+
+    overrides: dict = {}
+    config_file = env.get(ENV_PREFIX + "CONFIG")
+    if config_file:
+        overrides.update(json.loads(Path(config_file).read_text()))
+
+    profile = env.get(ENV_PREFIX + "PROFILE") or overrides.get("profile", "default")
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown performance profile {profile!r}; expected one of {sorted(PROFILES)}")
+
+    values = {"profile": profile, **PROFILES[profile]}
+    values.update({k: v for k, v in overrides.items() if k != "profile"})
+    for f in fields(Settings):
+        raw = env.get(ENV_PREFIX + f.name.upper())
+        if raw is not None and f.name != "profile":
+            values[f.name] = raw
+
+    known = {f.name: f.type for f in fields(Settings)}
+    unknown = set(values) - set(known)
+    if unknown:
+        raise ValueError(f"Unknown setting(s): {sorted(unknown)}")
+
+    return Settings(**{k: _coerce(k, v, known[k]) for k, v in values.items()})
+
+
+def with_profile(profile: str, base: Settings | None = None) -> Settings:
+    """Return `base` with a named profile's values applied (used by benchmarks)."""
+    base = base or Settings()
+    return replace(base, profile=profile, **PROFILES[profile])
+
+
+settings = load_settings()
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import bisect
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# In-process metrics registry rendered in Prometheus text format (no client lib needed).
+# Counters and histograms are keyed by a tuple of label values and guarded by one lock.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_lock = threading.Lock()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(labels.get(n, "") for n in self.labels)
+        return self._values.get(key, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, v in sorted(self._values.items()):
+            lines.append(f"{self.name}{_fmt_labels(self.labels, key)} {_fmt_value(v)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., sum, count]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            row = self._values.get(key)
+            if row is None:
+                row = [0] * len(self.buckets) + [0.0, 0]
+                self._values[key] = row
+            if idx < len(self.buckets):
+                row[idx] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def count(self, **labels) -> int:
+        key = tuple(labels.get(n, "") for n in self.labels)
+        row = self._values.get(key)
+        return row[-1] if row else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, row in sorted(self._values.items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets, row):
+                cumulative += c
+                le = f'le="{_fmt_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {cumulative}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, inf)} {row[-1]}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {_fmt_value(row[-2])}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {row[-1]}")
+        return lines
+
+
+_registry: list = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    """Render every registered metric in Prometheus text exposition format."""
+    with _lock:
+        lines = []
+        for m in _registry:
+            lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# Metric definitions
+# -------------------------
+DB_QUERY_SECONDS = _register(Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency by calling function.",
+    labels=("caller",),
+))
+DB_QUERIES_PER_CALL = _register(Histogram(
+    "db_queries_per_call",
+    "Number of SQL statements issued per instrumented call.",
+    labels=("caller",),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+DB_QUERY_ERRORS = _register(Counter(
+    "db_query_errors_total",
+    "SQL statements that raised (e.g. IntegrityError on duplicate ingest).",
+    labels=("caller",),
+))
+DB_SLOW_QUERIES = _register(Counter(
+    "db_slow_queries_total",
+    "SQL statements slower than the slow-query threshold.",
+    labels=("caller",),
+))
+HTTP_REQUEST_SECONDS = _register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    labels=("method", "route", "status"),
+))
+INGEST_BYTES = _register(Counter(
+    "ingest_bytes_read_total", "Bytes read from log files.", labels=("source",)))
+INGEST_LINES = _register(Counter(
+    "ingest_lines_total", "Log lines read, by parse outcome.", labels=("source", "outcome")))
+INGEST_ROWS = _register(Counter(
+    "ingest_rows_total", "Parsed rows written, by insert outcome.", labels=("source", "outcome")))
+INGEST_STAGE_SECONDS = _register(Counter(
+    "ingest_stage_seconds_total", "Time spent per ingest stage (parse vs write).", labels=("source", "stage")))
+
+
+# -------------------------
+# Query attribution
+# -------------------------
+# Name of the analytics/detection function currently issuing queries, and how many it has run.
+_caller: ContextVar[str] = ContextVar("metrics_caller", default="other")
+_query_count: ContextVar[list | None] = ContextVar("metrics_query_count", default=None)
+
+
+@contextmanager
+def query_scope(name: str):
+    """Attribute every SQL statement issued inside the block to `name`."""
+    counter = [0]
+    caller_token = _caller.set(name)
+    count_token = _query_count.set(counter)
+    try:
+        yield
+    finally:
+        _caller.reset(caller_token)
+        _query_count.reset(count_token)
+        DB_QUERIES_PER_CALL.observe(counter[0], caller=name)
+
+
+def instrumented(fn):
+    """Decorator form of query_scope, labelled with the function name."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with query_scope(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def _explain(cursor, statement: str, parameters) -> str:
+    try:
+        cur = cursor.connection.cursor()
+        try:
+            cur.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return "; ".join(str(row[-1]) for row in cur.fetchall())
+        finally:
+            cur.close()
+    except Exception as e:  # plan capture must never break the real query
+        return f"<explain failed: {e}>"
+
+
+def instrument_engine(engine, slow_query_seconds: float | None = None):
+    """Attach cursor-execute hooks that time every statement on `engine`.
+
+    Statements slower than `slow_query_seconds` (None disables) are logged with their query plan.
+    """
+    from sqlalchemy import event
+
+    # The start time lives on the per-statement execution context, so nothing outlives the
+    # statement even when it fails (after_cursor_execute never fires for a failed statement).
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    def _record(context, failed: bool) -> tuple[str, float] | None:
+        start = getattr(context, "_metrics_start", None)
+        if start is None:
+            return None
+        context._metrics_start = None
+        elapsed = time.perf_counter() - start
+        caller = _caller.get()
+        DB_QUERY_SECONDS.observe(elapsed, caller=caller)
+        if failed:
+            DB_QUERY_ERRORS.inc(caller=caller)
+        counter = _query_count.get()
+        if counter is not None:
+            counter[0] += 1
+        return caller, elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        if exception_context.execution_context is not None:
+            _record(exception_context.execution_context, failed=True)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        recorded = _record(context, failed=False)
+        if recorded is None:
+            return
+        caller, elapsed = recorded
+
+        if slow_query_seconds is not None and elapsed >= slow_query_seconds:
+            DB_SLOW_QUERIES.inc(caller=caller)
+            plan = None
+            if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                plan = _explain(cursor, statement, parameters)
+            logger.warning(
+                "slow query caller=%s elapsed_ms=%.1f sql=%s plan=%s",
+                caller, elapsed * 1000.0, " ".join(statement.split()), plan,
+            )
+
+    return engine
@@ -3,28 +3,82 @@ from typing import Generator
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import Session, sessionmaker, declarative_base
 
+from app.core.config import Settings, settings
+from app.core.metrics import instrument_engine
+
 #the engine is the connection to the database, sessionmaker creates isolated transaction scopes,
 # get_db is the dependency for the database session.
+# Two engines share the same file: `engine` is the writer (ingest, test events) and
+# `read_engine` is a query_only engine for analytics so readers never hold the write lock.
 
-DB_PATH = Path(__file__).resolve().parents[2] / "data" / "sentinel.db" #where the database lives
+DB_PATH = Path(settings.db_path) #where the database lives
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-DATABASE_URL = f"sqlite:///{DB_PATH}"
-
-engine = create_engine( #create the engine
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    pool_pre_ping=True,
-)
 
-# Enable WAL mode for better concurrent access
-@event.listens_for(engine, "connect")
-def set_sqlite_pragma(dbapi_conn, connection_record):
+def _apply_pragmas(dbapi_conn, cfg: Settings, read_only: bool):
     cursor = dbapi_conn.cursor()
-    cursor.execute("PRAGMA journal_mode=WAL")
+    if not read_only:
+        # WAL lets the read engine keep reading while the writer commits
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA wal_autocheckpoint={int(cfg.wal_autocheckpoint)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(cfg.busy_timeout)}")
+    cursor.execute(f"PRAGMA synchronous={cfg.synchronous}")
+    cursor.execute(f"PRAGMA cache_size={int(cfg.cache_size)}")
+    cursor.execute(f"PRAGMA mmap_size={int(cfg.mmap_size)}")
+    cursor.execute(f"PRAGMA temp_store={cfg.temp_store}")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
     cursor.close()
 
+
+def make_engine(cfg: Settings, read_only: bool = False):
+    """Create a tuned SQLite engine for `cfg`; read_only engines reject writes."""
+    eng = create_engine(
+        f"sqlite:///{cfg.db_path}",
+        connect_args={"check_same_thread": False},
+        # pre-ping buys nothing for a local file and costs a round trip per checkout
+        pool_pre_ping=not read_only,
+        pool_size=cfg.read_pool_size if read_only else cfg.pool_size,
+        max_overflow=cfg.read_max_overflow if read_only else cfg.max_overflow,
+    )
+
+    @event.listens_for(eng, "connect")
+    def set_sqlite_pragma(dbapi_conn, connection_record):
+        # let SQLAlchemy own BEGIN so SAVEPOINTs (session.begin_nested) nest correctly;
+        # pysqlite's own transaction handling would commit on the outermost RELEASE
+        dbapi_conn.isolation_level = None
+        _apply_pragmas(dbapi_conn, cfg, read_only)
+
+    @event.listens_for(eng, "begin")
+    def do_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    # Per-query latency histograms + optional slow-query log (see app/core/metrics.py)
+    slow = cfg.slow_query_ms / 1000.0 if cfg.slow_query_ms > 0 else None
+    return instrument_engine(eng, slow_query_seconds=slow)
+
+
+def checkpoint_wal(eng, cfg: Settings = settings):
+    """Run the configured post-ingest WAL checkpoint, if any."""
+    if not cfg.wal_checkpoint_after_ingest:
+        return None
+    # outside any BEGIN: a checkpoint can't move past a snapshot held by its own connection
+    dbapi_conn = eng.raw_connection()
+    try:
+        cursor = dbapi_conn.cursor()
+        cursor.execute(f"PRAGMA wal_checkpoint({cfg.wal_checkpoint_after_ingest})")
+        result = tuple(cursor.fetchone())
+        cursor.close()
+        return result
+    finally:
+        dbapi_conn.close()
+
+
+engine = make_engine(settings) #create the writer engine
+read_engine = make_engine(settings, read_only=True) #create the analytics engine
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)#create the session
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()#create the base
 
 
@@ -35,3 +89,12 @@ def get_db() -> Generator[Session, None, None]:
         yield db#yield the session
     finally:
         db.close()#close the session
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """read-only database session dependency for analytics routes."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
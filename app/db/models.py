@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Index, Integer, String, DateTime, Text
 from app.db.database import Base
 
 class Event(Base):
@@ -18,4 +18,10 @@ class Event(Base):
     raw = Column(Text, nullable=False)
 
     # ✅ Dedup key (must be present if your parser returns it)
-    fingerprint = Column(String(64), unique=True, index=True, nullable=False)
\ No newline at end of file
+    fingerprint = Column(String(64), unique=True, index=True, nullable=False)
+
+    # Time-window queries filter on (event_type, ts range); this lets the range bound the scan
+    # instead of walking every row of that type through ix_events_event_type.
+    __table_args__ = (
+        Index("ix_events_event_type_ts", "event_type", "ts"),
+    )
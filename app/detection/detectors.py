@@ -1,11 +1,14 @@
 from datetime import datetime, timezone, timedelta
 from sqlalchemy.orm import Session
+from app.core.metrics import instrumented
 from app.db.models import Event
+from app.detection.spray import spray_index
 
 
 # -------------------------
 # Detection: SSH brute force
 # -------------------------
+@instrumented
 def detect_ssh_bruteforce(db: Session, threshold: int = 5, window_minutes: int = 2):
     window_end = datetime.now(timezone.utc)
     window_start = window_end - timedelta(minutes=window_minutes)
@@ -38,4 +41,72 @@ def detect_ssh_bruteforce(db: Session, threshold: int = 5, window_minutes: int =
             })
 
     detected.sort(key=lambda d: d["count"], reverse=True)
-    return detected
\ No newline at end of file
+    return detected
+
+# -------------------------
+# Detection: SSH password spray / credential stuffing
+# -------------------------
+def _spray_hits(
+    index, by: str, first: int, last: int, min_distinct: int, window_minutes: int,
+    max_per_hour=None, min_span_minutes: int = 0,
+):
+    distinct_key = "distinct_usernames" if by == "ip" else "distinct_ips"
+    hits = []
+    for key, failures, distinct, exact, first_b, last_b in index.window(by, first, last):
+        if distinct < min_distinct:
+            continue
+        per_hour = failures / max(window_minutes / 60, 1e-9)
+        if max_per_hour is not None and per_hour > max_per_hour:
+            continue
+        if (last_b - first_b + 1) * index.bucket_seconds < min_span_minutes * 60:
+            continue
+        hits.append({
+            by: key,
+            distinct_key: distinct,
+            "approximate": not exact,
+            "failures": failures,
+            "failures_per_hour": round(per_hour, 2),
+            "first_seen_bucket": index.bucket_start(first_b).isoformat(),
+            "last_seen_bucket": index.bucket_start(last_b).isoformat(),
+            "threshold": min_distinct,
+            "window_minutes": window_minutes,
+        })
+    hits.sort(key=lambda d: (d[distinct_key], d["failures"]), reverse=True)
+    return hits
+
+
+def detect_ssh_spray(
+    db: Session,
+    index=None,
+    window_minutes: int = 60,
+    min_usernames_per_ip: int = 5,
+    min_ips_per_username: int = 5,
+    slow_window_hours: int = 24,
+    slow_min_usernames: int = 10,
+    slow_max_per_hour: float = 5.0,
+):
+    """
+    Spray-style detections from the incremental distinct-count index:
+    - password_spray: one IP trying many usernames within window_minutes
+    - credential_stuffing: one username hit from many IPs within window_minutes
+    - low_and_slow: one IP trying many usernames over slow_window_hours at a low hourly rate,
+      with activity spread over at least an hour (bursts are password_spray's job)
+    """
+    index = index or spray_index
+    # cost grows only with rows committed since the last call, by this or any other process
+    index.catch_up(db)
+
+    now = datetime.now(timezone.utc)
+    first, last = index.window_bounds(window_minutes, now)
+    slow_first, slow_last = index.window_bounds(slow_window_hours * 60, now)
+
+    return {
+        "window_start": index.bucket_start(first).isoformat(),
+        "window_end": now.isoformat(),
+        "password_spray": _spray_hits(index, "ip", first, last, min_usernames_per_ip, window_minutes),
+        "credential_stuffing": _spray_hits(index, "username", first, last, min_ips_per_username, window_minutes),
+        "low_and_slow": _spray_hits(
+            index, "ip", slow_first, slow_last, slow_min_usernames, slow_window_hours * 60,
+            max_per_hour=slow_max_per_hour, min_span_minutes=60,
+        ),
+    }
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import instrumented
+from app.db.models import Event
+from app.detection.distinct import DistinctCounter
+
+# Incrementally maintained distinct counts for spray detection:
+#   by_ip[ip][bucket]          -> [failures, distinct usernames]
+#   by_user[username][bucket]  -> [failures, distinct ips]
+# Fed from the events table by id: catch_up() reads only rows above the high-water id, so
+# every worker process (and any other writer) converges on what was actually committed.
+# A window query merges at most (window / bucket) counters per key, so its cost does not
+# depend on how many events fell inside the window.
+
+
+def _utc(ts: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything we store is UTC
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+class SprayIndex:
+    def __init__(self, bucket_minutes: int = 5, retention_hours: int = 168, exact_limit: int = 64):
+        self.bucket_seconds = bucket_minutes * 60
+        self.retention_buckets = -(-(retention_hours * 3600) // self.bucket_seconds)
+        self.exact_limit = exact_limit
+        self.by_ip: dict[str, dict[int, list]] = {}
+        self.by_user: dict[str, dict[int, list]] = {}
+        self._lock = threading.Lock()
+        self._catch_up_lock = threading.Lock()
+        self._pruned_at = 0
+        self.high_water_id = 0
+
+    def _bucket(self, ts: datetime) -> int:
+        return int(_utc(ts).timestamp()) // self.bucket_seconds
+
+    def _oldest_bucket(self) -> int:
+        return int(datetime.now(timezone.utc).timestamp()) // self.bucket_seconds - self.retention_buckets
+
+    def _add(self, table: dict, key: str, bucket: int, value: str):
+        slot = table.setdefault(key, {}).get(bucket)
+        if slot is None:
+            slot = table[key][bucket] = [0, DistinctCounter(self.exact_limit)]
+        slot[0] += 1
+        slot[1].add(value)
+
+    def add_many(self, rows):
+        """Record (ts, ip, username) failed attempts."""
+        oldest = self._oldest_bucket()
+        with self._lock:
+            for ts, ip, username in rows:
+                if ts is None or not ip or not username:
+                    continue
+                bucket = self._bucket(ts)
+                if bucket < oldest:
+                    continue
+                self._add(self.by_ip, ip, bucket, username)
+                self._add(self.by_user, username, bucket, ip)
+            if oldest > self._pruned_at:
+                self._prune(oldest)
+
+    def _prune(self, oldest: int):
+        for table in (self.by_ip, self.by_user):
+            for key in list(table):
+                buckets = table[key]
+                for b in [b for b in buckets if b < oldest]:
+                    del buckets[b]
+                if not buckets:
+                    del table[key]
+        self._pruned_at = oldest
+
+    def clear(self):
+        with self._lock:
+            self.by_ip.clear()
+            self.by_user.clear()
+            self._pruned_at = 0
+            self.high_water_id = 0
+
+    @instrumented
+    def catch_up(self, db: Session, batch_size: int = 10000) -> int:
+        """Add failed attempts committed since the last call (id > high_water_id)."""
+        with self._catch_up_lock:
+            q = db.query(Event.id, Event.ts, Event.ip, Event.username).filter(
+                Event.event_type == "ssh_failed_password",
+                Event.ip.isnot(None),
+                Event.username.isnot(None),
+            )
+            if self.high_water_id == 0:
+                # Cold start: only the retention span matters. Range on ts (served by
+                # ix_events_event_type_ts) up to the current max id, and adopt that id as the
+                # high-water mark even if nothing falls in retention, so later calls take the
+                # cheap `id > ?` path instead of repeating this scan.
+                high_water = db.query(func.max(Event.id)).scalar() or 0
+                since = datetime.now(timezone.utc) - timedelta(seconds=self.retention_buckets * self.bucket_seconds)
+                # `id + 0` keeps the id bound from being used as a rowid range, so the ts range drives
+                q = q.filter(Event.ts >= since, Event.id + 0 <= high_water)
+            else:
+                high_water = self.high_water_id
+                q = q.filter(Event.id > high_water)
+
+            added = 0
+            batch = []
+            for row_id, ts, ip, username in q.order_by(Event.id).yield_per(batch_size):
+                batch.append((ts, ip, username))
+                high_water = max(high_water, row_id)
+                if len(batch) >= batch_size:
+                    self.add_many(batch)
+                    added += len(batch)
+                    batch = []
+            self.add_many(batch)
+            self.high_water_id = high_water
+            return added + len(batch)
+
+    def rebuild(self, db: Session) -> int:
+        """Reload the retention span from the events table (startup warm-up)."""
+        self.clear()
+        return self.catch_up(db)
+
+    def window_bounds(self, minutes: int, now: datetime | None = None) -> tuple[int, int]:
+        # Bucket-aligned: every bucket overlapping [now - minutes, now]
+        now = now or datetime.now(timezone.utc)
+        return self._bucket(now - timedelta(minutes=minutes)), self._bucket(now)
+
+    def bucket_start(self, bucket: int) -> datetime:
+        return datetime.fromtimestamp(bucket * self.bucket_seconds, tz=timezone.utc)
+
+    def window(self, by: str, first: int, last: int) -> list[tuple]:
+        """(key, failures, distinct count, exact?, first_bucket, last_bucket) over buckets [first, last]."""
+        table = self.by_ip if by == "ip" else self.by_user
+        out = []
+        with self._lock:
+            for key, buckets in table.items():
+                # touch only the requested buckets (or the key's own buckets, if fewer)
+                if len(buckets) < last - first + 1:
+                    in_range = sorted(b for b in buckets if first <= b <= last)
+                else:
+                    in_range = [b for b in range(first, last + 1) if b in buckets]
+                failures = 0
+                merged = None
+                seen = []
+                for b in in_range:
+                    count, distinct = buckets[b]
+                    failures += count
+                    seen.append(b)
+                    if merged is None:
+                        merged = distinct.copy()
+                    else:
+                        merged.merge(distinct)
+                if merged is not None:
+                    out.append((key, failures, merged.count(), merged.is_exact, min(seen), max(seen)))
+        return out
+
+
+spray_index = SprayIndex(
+    bucket_minutes=settings.spray_bucket_minutes,
+    retention_hours=settings.spray_retention_hours,
+    exact_limit=settings.spray_exact_limit,
+)
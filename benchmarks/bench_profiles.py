@@ -0,0 +1,185 @@
+"""
+Compare SQLite performance profiles (app/core/config.py) on ingest and analytics.
+
+    python -m benchmarks.bench_profiles --lines 20000 --repeat 5
+
+Each profile gets a fresh temporary database. Ingest mirrors POST /ingest/ssh
+(parse, savepoint + flush per row, commit, post-ingest checkpoint) on the writer
+engine; the analytics calls then run on the profile's read-only engine. A second
+phase times ssh_summary while another ingest is in flight, on the read-only engine
+and through the writer's pool, to show reader/writer contention.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# keep the module-level production engine away from data/sentinel.db
+os.environ.setdefault("LOCKDOWN_DB_PATH", str(Path(tempfile.gettempdir()) / "lockdown-bench-unused.db"))
+
+from sqlalchemy.exc import IntegrityError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.analytics.kpis import ssh_business_kpis  # noqa: E402
+from app.analytics.ssh import ssh_summary  # noqa: E402
+from app.analytics.top_attackers import top_attackers  # noqa: E402
+from app.analytics.trends import ssh_trends  # noqa: E402
+from app.core.config import PROFILES, Settings, with_profile  # noqa: E402
+from app.db.database import Base, checkpoint_wal, make_engine  # noqa: E402
+from app.db.models import Event  # noqa: E402
+from app.ingest.parser import parse_ssh_line  # noqa: E402
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+USERS = ["root", "admin", "ubuntu", "test", "oracle", "postgres", "git", "deploy"]
+
+ANALYTICS = {
+    "ssh_summary": lambda db: ssh_summary(db, window_hours=24),
+    "ssh_kpis": lambda db: ssh_business_kpis(db, window_hours=24),
+    "top_attackers": lambda db: top_attackers(db, window_hours=24),
+    "ssh_trends": lambda db: ssh_trends(db, window_hours=24),
+}
+
+
+def synthetic_lines(n: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    ips = [f"203.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}" for _ in range(max(n // 50, 10))]
+    lines = []
+    for i in range(n):
+        ts = now - timedelta(minutes=rng.randint(0, 47 * 60))
+        lines.append(
+            f"{MONTHS[ts.month - 1]} {ts.day:2d} {ts:%H:%M:%S} server sshd[{1000 + i}]: "
+            f"Failed password for {rng.choice(USERS)} from {rng.choice(ips)} port {rng.randint(1024, 65535)} ssh2"
+        )
+    return lines
+
+
+def _ingest(writer, cfg: Settings, lines: list[str]) -> float:
+    # mirrors POST /ingest/ssh: savepoint + flush per row, one commit, post-ingest checkpoint
+    db = sessionmaker(bind=writer, autoflush=False)()
+    start = time.perf_counter()
+    for line in lines:
+        parsed = parse_ssh_line(line)
+        if not parsed:
+            continue
+        try:
+            with db.begin_nested():
+                db.add(Event(**parsed))
+                db.flush()
+        except IntegrityError:
+            pass
+    db.commit()
+    checkpoint_wal(writer, cfg)
+    db.close()
+    return time.perf_counter() - start
+
+
+def _reads_during(engine, busy: threading.Event, fn) -> list[float]:
+    # run `fn` back to back on `engine` until the concurrent ingest finishes
+    db = sessionmaker(bind=engine)()
+    timings = []
+    try:
+        while busy.is_set() or not timings:
+            t0 = time.perf_counter()
+            fn(db)
+            db.rollback()  # end the read transaction so each call sees fresh data
+            timings.append(time.perf_counter() - t0)
+    finally:
+        db.close()
+    return timings
+
+
+def _contended(writer, cfg: Settings, lines: list[str], read_engine) -> list[float]:
+    busy = threading.Event()
+    busy.set()
+
+    def run_ingest():
+        try:
+            _ingest(writer, cfg, lines)
+        finally:
+            busy.clear()
+
+    t = threading.Thread(target=run_ingest)
+    t.start()
+    try:
+        return _reads_during(read_engine, busy, ANALYTICS["ssh_summary"])
+    finally:
+        t.join()
+
+
+def _ms(timings: list[float], pct: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] * 1000.0
+
+
+def bench_profile(profile: str, lines: list[str], extra_lines: list[str], repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        cfg = with_profile(profile, Settings(db_path=str(Path(tmp) / "bench.db")))
+        writer = make_engine(cfg)
+        reader = make_engine(cfg, read_only=True)
+        Base.metadata.create_all(bind=writer)
+
+        ingest_s = _ingest(writer, cfg, lines)
+        result = {"profile": profile, "ingest_rows_per_s": len(lines) / ingest_s}
+
+        read_db = sessionmaker(bind=reader)()
+        for name, fn in ANALYTICS.items():
+            fn(read_db)  # warm the page cache / mmap
+            timings = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                fn(read_db)
+                timings.append(time.perf_counter() - t0)
+            result[name] = statistics.median(timings) * 1000.0
+        read_db.close()
+
+        # ssh_summary latency while a second ingest is running: once on the read-only
+        # engine, once through the writer's own pool (how every route worked before)
+        half = len(extra_lines) // 2
+        for label, engine, batch in (
+            ("read_engine", reader, extra_lines[:half]),
+            ("writer_pool", writer, extra_lines[half:]),
+        ):
+            timings = _contended(writer, cfg, batch, engine)
+            result[f"{label}_p50"] = _ms(timings, 0.5)
+            result[f"{label}_p95"] = _ms(timings, 0.95)
+
+        writer.dispose()
+        reader.dispose()
+        return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--lines", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--profiles", nargs="*", default=list(PROFILES))
+    args = ap.parse_args()
+
+    lines = synthetic_lines(args.lines)
+    extra_lines = synthetic_lines(args.lines, seed=11)
+    cols = ["ingest_rows_per_s", *ANALYTICS]
+    contended = ["read_engine_p50", "read_engine_p95", "writer_pool_p50", "writer_pool_p95"]
+    results = [bench_profile(profile, lines, extra_lines, args.repeat) for profile in args.profiles]
+
+    print(f"{args.lines} lines, median of {args.repeat} runs (analytics in ms)")
+    print(f"{'profile':<14}" + "".join(f"{c:>20}" for c in cols))
+    for r in results:
+        print(f"{r['profile']:<14}" + "".join(f"{r[c]:>20.1f}" for c in cols))
+
+    print()
+    print("ssh_summary latency (ms) while another ingest is running")
+    print(f"{'profile':<14}" + "".join(f"{c:>20}" for c in contended))
+    for r in results:
+        print(f"{r['profile']:<14}" + "".join(f"{r[c]:>20.1f}" for c in contended))
+
+
+if __name__ == "__main__":
+    main()
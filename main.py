@@ -1,14 +1,45 @@
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from app.api.routes import router
 
-from app.db.database import engine, Base
+from app.core.metrics import HTTP_REQUEST_SECONDS
+from app.db.database import ReadSessionLocal, engine, Base
 from app.db import models  # IMPORTANT: registers Event model
+from app.detection.spray import spray_index
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
+    # create_all skips existing tables, so add indexes introduced after a DB was first created
+    for index in models.Event.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    # warm the in-memory spray index from events already in the retention window
+    db = ReadSessionLocal()
+    try:
+        spray_index.rebuild(db)
+    finally:
+        db.close()
     yield
 
 app = FastAPI(title="Lockdown Log Analyzer", lifespan=lifespan)
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template (not raw path) so metric cardinality stays bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )